@@ -5,9 +5,30 @@ import msgpack
 import pickle
 import zlib
 import configparser
+import contextlib
+import threading
+import time
+import collections
+import collections.abc
 import functools
+import itertools
 import lmdb
 
+try:
+    import msgspec
+except ImportError:  # Optional, only for serial='msgspec'
+    msgspec = None
+
+try:
+    import zstandard
+except ImportError:  # Optional, only for compress='zstd'
+    zstandard = None
+
+try:
+    import lz4.block
+except ImportError:  # Optional, only for compress='lz4'
+    lz4 = None
+
 
 class ShareDB(object):
     __license__ = '''
@@ -40,16 +61,16 @@ class ShareDB(object):
 
     (1) the key-value information needs to persist locally for later reuse,
     (2) the data needs to be shared across multiple processes with minimal overhead, and
-    (3) the keys and values can be (de)serialized via msgpack or pickle.
+    (3) the keys and values can be (de)serialized via msgpack, msgspec or pickle.
 
     A ShareDB instance may be opened simultaneously in children, for reading in parallel,
     while a single parent writes to the instance. Parallel writes made across processes
     are not safe; they are not guaranteed to be written, and may corrupt instance. ShareDB
-    is primarily developed and tested using Linux and is compatible with both Python 2.7
-    and Python 3.6 and above.
+    is primarily developed and tested using Linux and is compatible with Python 3.6 and
+    above.
     '''
 
-    __version__ = '1.1.4'
+    __version__ = '1.2.0'
 
     __author__  = 'Ayaan Hossain'
 
@@ -60,17 +81,29 @@ class ShareDB(object):
         compress    = False,
         readers     = 100,
         buffer_size = 10**5,
-        map_size    = 10**12):
+        map_size    = 10**12,
+        sync_mode   = 'safe',
+        cache_size  = 0,
+        readahead   = False,
+        writemap    = True,
+        map_async   = True,
+        meminit     = True,
+        readonly    = False,
+        autogrow    = False):
         '''
         ShareDB constructor.
 
-        path        - string, a/path/to/a/directory/to/persist/the/data
+        path        - string or os.PathLike, a/path/to/a/directory/to/persist/the/data
         reset       - boolean, if True - delete and recreate path following
                       subsequent parameters
                       (default=False)
-        serial      - string, must be either 'msgpack' or 'pickle'
+        serial      - string, must be 'msgpack', 'pickle' or 'msgspec',
+                      'msgspec' writes msgpack via the faster msgspec
+                      package, if installed
                       (default='pickle')
-        compress    - boolean, if True - will compress the values using zlib
+        compress    - boolean/string, if True or 'zlib' - will compress the
+                      values using zlib, if 'zstd' or 'lz4' - using the
+                      faster zstandard or lz4 package, if installed
                       (default=False)
         readers     - integer, max no. of processes that may read data in
                       parallel
@@ -80,6 +113,55 @@ class ShareDB(object):
         map_size    - integer, max amount of bytes to allocate for storage,
                       if None, then the entire disk is marked for use (safe)
                       (default=10**12, or 1 TB)
+        sync_mode   - string, must be 'safe', 'nosync_safe' or 'nosync_unsafe',
+                      'safe' - every commit is flushed to disk (durable),
+                      'nosync_safe' - commits are flushed but metadata is
+                      not, the last commit may be lost on a system crash,
+                      but the instance stays consistent,
+                      'nosync_unsafe' - neither commits nor metadata are
+                      flushed, a system crash may corrupt the instance,
+                      an explicit sync() always flushes to disk; the
+                      guarantees of 'safe' and 'nosync_safe' hold only
+                      with map_async=False (or writemap=False), as
+                      asynchronous map flushes may corrupt the instance
+                      on a system crash
+                      (default='safe')
+        cache_size  - integer, max no. of recently read values to cache in
+                      this process, packed, so each get returns a fresh
+                      object, if 0 - caching is disabled; cached
+                      values may go stale if other processes write to
+                      the same path, so enable only for a sole writer
+                      (default=0)
+        readahead   - boolean, if True - let the OS read ahead on the memory
+                      map, which helps large sequential scans, while False
+                      avoids page cache pollution for random reads on large
+                      maps
+                      (default=False)
+        writemap    - boolean, if True - write directly to a writeable
+                      memory map, which is faster but offers no protection
+                      against stray writes, so use only with trusted code
+                      (default=True)
+        map_async   - boolean, if True - flush the writeable memory map
+                      asynchronously, used only with writemap=True; like
+                      'nosync_unsafe', a system crash may then corrupt the
+                      instance, so set False for crash safety
+                      (default=True)
+        meminit     - boolean, if True - zero out unused memory in new
+                      pages before writing, unused with writemap=True
+                      (default=True)
+        readonly    - boolean, if True - open an existing instance for reading
+                      only, all write operations raise RuntimeError, and
+                      reset must be False
+                      (default=False)
+        autogrow    - boolean, if True - when the memory map is full, a set
+                      or sized multiset outside a batch grows map_size
+                      (doubling, by at least 128 MB, up to free disk space)
+                      and retries once instead of raising MemoryError,
+                      unless other transactions of this process are open;
+                      other processes adopt the grown map on their next
+                      transaction; writes must come from one thread at a
+                      time, reads may run in any thread
+                      (default=False)
 
         Returns: self to ShareDB object.
 
@@ -87,34 +169,13 @@ class ShareDB(object):
 
         >>> myDB = ShareDB(path=None)
         Traceback (most recent call last):
-        TypeError: Given path=None of <class 'NoneType'>,
-                         reset=False of <class 'bool'>,
-                         serial=pickle of <class 'str'>,
-                         compress=False of <class 'bool'>,
-                         readers=100 of <class 'int'>,
-                         buffer_size=100000 of <class 'int'>,
-                         map_size=1000000000000 of <class 'int'>,
-                         raised: 'NoneType' object has no attribute 'endswith'
+        TypeError: path=None of <class 'NoneType'> must be a string
         >>> myDB = ShareDB(path=True)
         Traceback (most recent call last):
-        TypeError: Given path=True of <class 'bool'>,
-                         reset=False of <class 'bool'>,
-                         serial=pickle of <class 'str'>,
-                         compress=False of <class 'bool'>,
-                         readers=100 of <class 'int'>,
-                         buffer_size=100000 of <class 'int'>,
-                         map_size=1000000000000 of <class 'int'>,
-                         raised: 'bool' object has no attribute 'endswith'
+        TypeError: path=True of <class 'bool'> must be a string
         >>> myDB = ShareDB(path=123)
         Traceback (most recent call last):
-        TypeError: Given path=123 of <class 'int'>,
-                         reset=False of <class 'bool'>,
-                         serial=pickle of <class 'str'>,
-                         compress=False of <class 'bool'>,
-                         readers=100 of <class 'int'>,
-                         buffer_size=100000 of <class 'int'>,
-                         map_size=1000000000000 of <class 'int'>,
-                         raised: 'int' object has no attribute 'endswith'
+        TypeError: path=123 of <class 'int'> must be a string
         >>> myDB = ShareDB(path='/22.f')
         Traceback (most recent call last):
         TypeError: Given path=/22.f.ShareDB/ of <class 'str'>,
@@ -124,6 +185,14 @@ class ShareDB(object):
                          readers=100 of <class 'int'>,
                          buffer_size=100000 of <class 'int'>,
                          map_size=1000000000000 of <class 'int'>,
+                         sync_mode=safe of <class 'str'>,
+                         cache_size=0 of <class 'int'>,
+                         readahead=False of <class 'bool'>,
+                         writemap=True of <class 'bool'>,
+                         map_async=True of <class 'bool'>,
+                         meminit=True of <class 'bool'>,
+                         readonly=False of <class 'bool'>,
+                         autogrow=False of <class 'bool'>,
                          raised: [Errno 13] Permission denied: '/22.f.ShareDB/'
         >>> myDB = ShareDB(path='./test_init.ShareDB', reset=True, serial='something_fancy')
         Traceback (most recent call last):
@@ -134,7 +203,15 @@ class ShareDB(object):
                          readers=100 of <class 'int'>,
                          buffer_size=100000 of <class 'int'>,
                          map_size=1000000000000 of <class 'int'>,
-                         raised: serial must be 'msgpack' or 'pickle' not something_fancy
+                         sync_mode=safe of <class 'str'>,
+                         cache_size=0 of <class 'int'>,
+                         readahead=False of <class 'bool'>,
+                         writemap=True of <class 'bool'>,
+                         map_async=True of <class 'bool'>,
+                         meminit=True of <class 'bool'>,
+                         readonly=False of <class 'bool'>,
+                         autogrow=False of <class 'bool'>,
+                         raised: serial must be 'msgpack', 'pickle' or 'msgspec' not something_fancy
         >>> myDB = ShareDB(path='./test_init.ShareDB', reset=True, readers='XYZ', buffer_size=100, map_size=10**3)
         Traceback (most recent call last):
         TypeError: Given path=./test_init.ShareDB/ of <class 'str'>,
@@ -144,7 +221,33 @@ class ShareDB(object):
                          readers=XYZ of <class 'str'>,
                          buffer_size=100 of <class 'int'>,
                          map_size=1000 of <class 'int'>,
+                         sync_mode=safe of <class 'str'>,
+                         cache_size=0 of <class 'int'>,
+                         readahead=False of <class 'bool'>,
+                         writemap=True of <class 'bool'>,
+                         map_async=True of <class 'bool'>,
+                         meminit=True of <class 'bool'>,
+                         readonly=False of <class 'bool'>,
+                         autogrow=False of <class 'bool'>,
                          raised: invalid literal for int() with base 10: 'XYZ'
+        >>> myDB = ShareDB(path='./test_init.ShareDB', reset=True, sync_mode='fast')
+        Traceback (most recent call last):
+        TypeError: Given path=./test_init.ShareDB/ of <class 'str'>,
+                         reset=True of <class 'bool'>,
+                         serial=pickle of <class 'str'>,
+                         compress=False of <class 'bool'>,
+                         readers=100 of <class 'int'>,
+                         buffer_size=100000 of <class 'int'>,
+                         map_size=1000000000000 of <class 'int'>,
+                         sync_mode=fast of <class 'str'>,
+                         cache_size=0 of <class 'int'>,
+                         readahead=False of <class 'bool'>,
+                         writemap=True of <class 'bool'>,
+                         map_async=True of <class 'bool'>,
+                         meminit=True of <class 'bool'>,
+                         readonly=False of <class 'bool'>,
+                         autogrow=False of <class 'bool'>,
+                         raised: sync_mode must be 'safe', 'nosync_safe' or 'nosync_unsafe' not fast
         >>> myDB = ShareDB(path='./test_init.ShareDB', reset=True, readers=40, buffer_size=100, map_size=10**3)
         >>> myDB.PATH
         './test_init.ShareDB/'
@@ -158,17 +261,45 @@ class ShareDB(object):
         0
         >>> myDB.MSLIMIT
         1000
+        >>> myDB.SYNCMODE
+        'safe'
         >>> len(myDB) == 0
         True
         >>> myDB.drop()
         True
         '''
+        # Validate path argument, resolving path-like objects
+        if isinstance(path, os.PathLike):
+            path = os.fspath(path)
+        if not isinstance(path, str):
+            raise TypeError(
+                'path={} of {} must be a string'.format(
+                    path, type(path)))
+
         try:
             # Format path correctly
-            path = ShareDB._trim_suffix(given_str=path, suffix='/')
-            path = ShareDB._trim_suffix(given_str=path, suffix='.ShareDB')
+            path = path.rstrip('/')
+            if path.endswith('.ShareDB'):
+                path = path[:-8]
             path += '.ShareDB/'
 
+            # Readonly instances must already exist, and are never reset
+            if readonly and (reset or not os.path.exists(path + 'ShareDB.config')):
+                raise ValueError(
+                    'readonly requires an existing instance and reset=False')
+
+            # Parse parameters that are not persisted before touching disk
+            rcsize = int(cache_size)
+            if rcsize < 0:
+                raise ValueError(
+                    'cache_size must be non-negative not {}'.format(
+                        cache_size))
+
+            # Validate parameters for a new instance before touching disk
+            if reset or not os.path.exists(path + 'ShareDB.config'):
+                ShareDB._validate_params(
+                    serial, compress, readers, buffer_size, map_size, sync_mode)
+
             # Reset ShareDB instance if necessary
             if reset:
                 ShareDB._clear_path(path)
@@ -185,7 +316,8 @@ class ShareDB(object):
             # Create configuration if absent
             if not os.path.exists(path + 'ShareDB.config'):
                 config = ShareDB._store_config(
-                    path, serial, compress, readers, buffer_size, min(map_size, max_space))
+                    path, serial, compress, readers, buffer_size, min(map_size, max_space),
+                    sync_mode)
             # Otherwise load configuration
             else:
                 config = ShareDB._load_config(path)
@@ -194,41 +326,74 @@ class ShareDB(object):
             self.PATH  = path  # Path to ShareDB
             self.ALIVE = True  # Instance is alive
 
+            # Whether write operations are disabled (not persisted)
+            self.READONLY = bool(readonly)
+
             # (Un)serialization scheme argument
-            self.SERIAL = config.get('ShareDB Config', 'SERIAL')
+            self.SERIAL = config['SERIAL']
 
             # Whether to compress packed values for storage?
-            self.COMPRESS = config.getboolean('ShareDB Config', 'COMPRESS')
+            self.COMPRESS = config['COMPRESS']
 
             # Serialization function to use for (un)packing keys and values
             self.KEYP, self.KEYU, self.VALP, self.VALU = ShareDB._get_serial_funcs(
                 serial=self.SERIAL, compress=self.COMPRESS)
 
             # Number of processes reading in parallel
-            self.READERS = config.getint('ShareDB Config', 'READERS')
+            self.READERS = config['READERS']
 
             # Trigger sync after this many items inserted
-            self.BCSIZE = config.getint('ShareDB Config', 'BCSIZE')
+            self.BCSIZE = config['BCSIZE']
 
             # Approx. no. of items to sync in ShareDB
             self.BQSIZE = 0
 
             # Memory map size, maybe larger than RAM
-            self.MSLIMIT = config.getint('ShareDB Config', 'MSLIMIT')
+            self.MSLIMIT = config['MSLIMIT']
+
+            # Whether to grow a full memory map (not persisted)
+            self.AUTOGROW = bool(autogrow)
+
+            # Durability tier for commits (configs predating it are 'safe')
+            self.SYNCMODE = config.get('SYNCMODE', 'safe')
+
+            # LMDB sync flags corresponding to durability tier
+            sync, metasync = ShareDB._get_sync_flags(sync_mode=self.SYNCMODE)
 
-            # Instantiate the underlying LMDB structure
+            # Max no. of recently read values cached (not persisted)
+            self.RCSIZE = rcsize
+
+            # Recently read packed values keyed by packed keys, in LRU order
+            self.RCACHE = collections.OrderedDict()
+
+            # Per-thread state, holds the write txn of an active batch
+            self.LOCAL = threading.local()
+
+            # Serializes read txn begins against memory map resizes
+            self.MAPLOCK = threading.Lock()
+
+            # Instantiate the underlying LMDB structure (memory map flags
+            # are per process, so not persisted)
             self.DB = lmdb.open(
                 self.PATH,
                 subdir=True,
                 map_size=self.MSLIMIT,
                 create=True,
-                readahead=False,
-                writemap=True,
-                map_async=True,
+                readahead=bool(readahead),
+                writemap=bool(writemap),
+                map_async=bool(map_async),
+                meminit=bool(meminit),
+                readonly=self.READONLY,
+                sync=sync,
+                metasync=metasync,
                 max_readers=self.READERS,
                 max_dbs=0,
                 lock=True)
 
+            # Reclaim reader slots held by dead processes, since each
+            # process must open its own instance (never share across fork)
+            self.DB.reader_check()
+
         except Exception as E:
             raise TypeError(
                 '''Given path={} of {},
@@ -238,6 +403,14 @@ class ShareDB(object):
                  readers={} of {},
                  buffer_size={} of {},
                  map_size={} of {},
+                 sync_mode={} of {},
+                 cache_size={} of {},
+                 readahead={} of {},
+                 writemap={} of {},
+                 map_async={} of {},
+                 meminit={} of {},
+                 readonly={} of {},
+                 autogrow={} of {},
                  raised: {}'''.format(
                     path,        type(path),
                     reset,       type(reset),
@@ -246,16 +419,15 @@ class ShareDB(object):
                     readers,     type(readers),
                     buffer_size, type(buffer_size),
                     map_size,    type(map_size),
-                    E))
-
-    @staticmethod
-    def _trim_suffix(given_str, suffix):
-        '''
-        Internal helper function to trim suffixes in given_str.
-        '''
-        if given_str.endswith(suffix):
-            return given_str[:-len(suffix)]
-        return given_str
+                    sync_mode,   type(sync_mode),
+                    cache_size,  type(cache_size),
+                    readahead,   type(readahead),
+                    writemap,    type(writemap),
+                    map_async,   type(map_async),
+                    meminit,     type(meminit),
+                    readonly,    type(readonly),
+                    autogrow,    type(autogrow),
+                    E)) from E
 
     @staticmethod
     def _clear_path(path):
@@ -270,20 +442,43 @@ class ShareDB(object):
                 os.remove(filepath)
 
     @staticmethod
-    def _store_config(path, serial, compress, readers, buffer_size, map_size):
+    def _validate_params(serial, compress, readers, buffer_size, map_size, sync_mode):
+        '''
+        Internal helper function to validate parameters of a new ShareDB instance.
+        '''
+        # Parameters are normalized as stored configurations normalize them
+        ShareDB._get_serial_funcs(
+            serial=str(serial).lower(), compress=str(compress).lower())
+        ShareDB._get_sync_flags(sync_mode=str(sync_mode))
+        int(str(readers))
+        int(str(buffer_size))
+        if map_size is not None:
+            int(str(map_size))
+        return None
+
+    @staticmethod
+    def _store_config(path, serial, compress, readers, buffer_size, map_size, sync_mode):
         '''
         Internal helper funtion to create ShareDB configuration file.
         '''
-        config = configparser.RawConfigParser()
-        config.add_section('ShareDB Config')
-        config.set('ShareDB Config', 'SERIAL',   str(serial).lower())
-        config.set('ShareDB Config', 'COMPRESS', str(compress))
-        config.set('ShareDB Config', 'READERS',  str(readers))
-        config.set('ShareDB Config', 'BCSIZE',   str(buffer_size))
-        config.set('ShareDB Config', 'MSLIMIT',  str(map_size))
+        # Parse parameters as text configurations were parsed,
+        # compressor names are kept as given
+        compress = str(compress).lower()
+        if compress not in ShareDB._get_compressors():
+            compress = configparser.ConfigParser.BOOLEAN_STATES[compress]
+        config = {
+            'SERIAL'  : str(serial).lower(),
+            'COMPRESS': compress,
+            'READERS' : int(str(readers)),
+            'BCSIZE'  : int(str(buffer_size)),
+            'MSLIMIT' : int(str(map_size)),
+            'SYNCMODE': str(sync_mode)}
+        # Replace atomically, so concurrent openers never load a partial file
         config_file_path = path+'ShareDB.config'
-        with open(config_file_path, 'w') as config_file:
-            config.write(config_file)
+        temp_file_path   = '{}.{}.tmp'.format(config_file_path, os.getpid())
+        with open(temp_file_path, 'wb') as config_file:
+            config_file.write(msgpack.packb(config, use_bin_type=True))
+        os.replace(temp_file_path, config_file_path)
         return config
 
     @staticmethod
@@ -291,11 +486,22 @@ class ShareDB(object):
         '''
         Internal helper funtion to load ShareDB configuration file.
         '''
-        config = configparser.ConfigParser()
         config_file_path = path+'ShareDB.config'
-        with open(config_file_path) as config_file:
-            config.read_file(config_file)
-        return config
+        with open(config_file_path, 'rb') as config_file:
+            config = config_file.read()
+        # Configurations predating msgpack are INI text
+        if config.startswith(b'['):
+            legacy = configparser.ConfigParser()
+            legacy.read_string(config.decode())
+            section = legacy['ShareDB Config']
+            return {
+                'SERIAL'  : section.get('SERIAL'),
+                'COMPRESS': section.getboolean('COMPRESS'),
+                'READERS' : section.getint('READERS'),
+                'BCSIZE'  : section.getint('BCSIZE'),
+                'MSLIMIT' : section.getint('MSLIMIT'),
+                'SYNCMODE': section.get('SYNCMODE', fallback='safe')}
+        return msgpack.unpackb(config, raw=False)
 
     @staticmethod
     def _get_base_packer(serial):
@@ -303,8 +509,11 @@ class ShareDB(object):
         Internal helper function to return key/value packer.
         '''
         if serial == 'msgpack':
-            return lambda x: msgpack.packb(x, use_bin_type=True)
-        return lambda x: pickle.dumps(x, protocol=pickle.HIGHEST_PROTOCOL)
+            # Reuse a single Packer instead of building one per packb call
+            return msgpack.Packer(use_bin_type=True, autoreset=True).pack
+        if serial == 'msgspec':
+            return msgspec.msgpack.Encoder().encode
+        return functools.partial(pickle.dumps, protocol=pickle.HIGHEST_PROTOCOL)
 
     @staticmethod
     def _get_base_unpacker(serial):
@@ -312,24 +521,76 @@ class ShareDB(object):
         Internal helper function to return key/value unpacker.
         '''
         if serial == 'msgpack':
-            return lambda x: msgpack.unpackb(x, raw=False, use_list=True)
-        return lambda x: pickle.loads(x)
+            return functools.partial(msgpack.unpackb, raw=False, use_list=True)
+        if serial == 'msgspec':
+            return msgspec.msgpack.Decoder().decode
+        return pickle.loads
+
+    @staticmethod
+    def _get_compressors():
+        '''
+        Internal helper function to return supported compressor names.
+        '''
+        return ('zlib', 'zstd', 'lz4')
 
-    @ staticmethod
-    def _get_compressed_packer(serial):
+    @staticmethod
+    def _get_compressor(compress):
+        '''
+        Internal helper function to resolve compress to a compressor name,
+        or None if values are to be stored uncompressed.
+        '''
+        compress = str(compress).lower()
+        if compress in ShareDB._get_compressors():
+            return compress
+        if compress not in configparser.ConfigParser.BOOLEAN_STATES:
+            raise ValueError(
+                'compress must be a boolean, \'zlib\', \'zstd\' or \'lz4\' not {}'.format(
+                    compress))
+        # Plain True has always meant zlib
+        return 'zlib' if configparser.ConfigParser.BOOLEAN_STATES[compress] else None
+
+    @staticmethod
+    def _get_codec(compressor):
+        '''
+        Internal helper function to return (compress, decompress) functions.
+        '''
+        if compressor == 'zstd':
+            # zstd contexts are reusable, but not across concurrent threads
+            contexts = threading.local()
+            def zstd_compress(data):
+                try:
+                    context = contexts.compressor
+                except AttributeError:
+                    context = contexts.compressor = zstandard.ZstdCompressor(level=3)
+                return context.compress(data)
+            def zstd_decompress(data):
+                try:
+                    context = contexts.decompressor
+                except AttributeError:
+                    context = contexts.decompressor = zstandard.ZstdDecompressor()
+                return context.decompress(data)
+            return zstd_compress, zstd_decompress
+        if compressor == 'lz4':
+            return lz4.block.compress, lz4.block.decompress
+        return zlib.compress, zlib.decompress
+
+    @staticmethod
+    def _get_compressed_packer(serial, compressor='zlib'):
         '''
         Internal helper function to return compressed packer.
         '''
         base_packer = ShareDB._get_base_packer(serial)
-        return lambda x: zlib.compress(base_packer(x))
+        compress    = ShareDB._get_codec(compressor)[0]
+        return lambda x: compress(base_packer(x))
 
-    @ staticmethod
-    def _get_decompressed_unpacker(serial):
+    @staticmethod
+    def _get_decompressed_unpacker(serial, compressor='zlib'):
         '''
         Internal helper function to return decompressed unpacker.
         '''
         base_unpacker = ShareDB._get_base_unpacker(serial)
-        return lambda x: base_unpacker(zlib.decompress(x))
+        decompress    = ShareDB._get_codec(compressor)[1]
+        return lambda x: base_unpacker(decompress(x))
 
     @staticmethod
     def _get_serial_funcs(serial, compress):
@@ -337,10 +598,22 @@ class ShareDB(object):
         Internal helper function to decide (un)packing functions.
         '''
         # Validate serial argument
-        if serial not in ['msgpack', 'pickle']:
+        if serial not in ['msgpack', 'pickle', 'msgspec']:
             raise ValueError(
-                'serial must be \'msgpack\' or \'pickle\' not {}'.format(
+                'serial must be \'msgpack\', \'pickle\' or \'msgspec\' not {}'.format(
                     serial))
+        if serial == 'msgspec' and msgspec is None:
+            raise ImportError(
+                'serial=\'msgspec\' requires the msgspec package')
+
+        # Validate compress argument
+        compressor = ShareDB._get_compressor(compress)
+        if compressor == 'zstd' and zstandard is None:
+            raise ImportError(
+                'compress=\'zstd\' requires the zstandard package')
+        if compressor == 'lz4' and lz4 is None:
+            raise ImportError(
+                'compress=\'lz4\' requires the lz4 package')
 
         # Setup base (un)packing functions
         base_packer   = ShareDB._get_base_packer(serial)
@@ -351,9 +624,9 @@ class ShareDB(object):
         key_unpacker  = base_unpacker
 
         # Setup value (un)packing functions
-        if compress:
-            value_packer   = ShareDB._get_compressed_packer(serial)
-            value_unpacker = ShareDB._get_decompressed_unpacker(serial)
+        if compressor:
+            value_packer   = ShareDB._get_compressed_packer(serial, compressor)
+            value_unpacker = ShareDB._get_decompressed_unpacker(serial, compressor)
         else:
             value_packer   = base_packer
             value_unpacker = base_unpacker
@@ -361,6 +634,21 @@ class ShareDB(object):
         # Return all (un)packer methods
         return key_packer, key_unpacker, value_packer, value_unpacker
 
+    @staticmethod
+    def _get_sync_flags(sync_mode):
+        '''
+        Internal helper function to decide LMDB (sync, metasync) flags.
+        '''
+        # Validate sync_mode argument
+        if sync_mode not in ['safe', 'nosync_safe', 'nosync_unsafe']:
+            raise ValueError(
+                'sync_mode must be \'safe\', \'nosync_safe\' or \'nosync_unsafe\' not {}'.format(
+                    sync_mode))
+
+        # Only 'safe' flushes metadata with each commit, and only 'nosync_unsafe'
+        # skips flushing commits, as LMDB stays consistent without metasync alone
+        return sync_mode != 'nosync_unsafe', sync_mode == 'safe'
+
     def alivemethod(method):
         '''
         Internal decorator gating ShareDB operations when instance is closed/dropped.
@@ -374,6 +662,19 @@ class ShareDB(object):
                     'Access to {} has been closed or dropped'.format(repr(self)))
         return wrapper
 
+    def writemethod(method):
+        '''
+        Internal decorator gating ShareDB write operations when instance is readonly.
+        '''
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not self.READONLY:
+                return method(self, *args, **kwargs)
+            else:
+                raise RuntimeError(
+                    'Write access to {} is disabled in readonly mode'.format(repr(self)))
+        return wrapper
+
     def __repr__(self):
         '''
         Pythonic dunder function to return a string representation of ShareDB instance.
@@ -533,36 +834,196 @@ class ShareDB(object):
         Internal helper function to trigger sync once enough items set.
         '''
         if self.BQSIZE >= self.BCSIZE:
-            self.sync()
+            # Unforced, so nosync tiers are honored
+            self.DB.sync(False)
             self.BQSIZE = 0
         return None
 
-    def _insert_kv_in_txn(self, key, val, txn):
+    def _grow_map(self):
+        '''
+        Internal helper function to grow a full memory map, if enabled.
+
+        Returns: True if grown, otherwise False.
+        '''
+        # A batch txn cannot be retried, and stays open across a resize
+        if not self.AUTOGROW or getattr(self.LOCAL, 'txn', None) is not None:
+            return False
+        map_size = max(self.MSLIMIT * 2, self.MSLIMIT + (128 << 20))
+        map_size = min(map_size, self.MSLIMIT + shutil.disk_usage(self.PATH).free)
+        if map_size <= self.MSLIMIT:
+            return False
+        # No read txn may begin between the check and the resize
+        with self.MAPLOCK:
+            # Readers of this process would be left on the old map, wait
+            # briefly for other threads, a reader of this thread never ends
+            deadline = time.monotonic() + 1.0
+            while self._has_open_readers():
+                if time.monotonic() > deadline:
+                    return False
+                time.sleep(0.001)
+            try:
+                self.DB.set_mapsize(map_size)
+            except lmdb.Error:  # Another thread is writing
+                return False
+        self.MSLIMIT = map_size
+        ShareDB._store_config(
+            self.PATH, self.SERIAL, self.COMPRESS, self.READERS,
+            self.BCSIZE, self.MSLIMIT, self.SYNCMODE)
+        return True
+
+    def _has_open_readers(self):
+        '''
+        Internal helper function to check if this process has read txns open.
+
+        Returns: True if any read txn is open, otherwise False.
+        '''
+        pid = str(os.getpid())
+        for reader in self.DB.readers().splitlines()[1:]:
+            reader_pid, _, txnid = reader.split()
+            if reader_pid == pid and txnid != '-':
+                return True
+        return False
+
+    def _adopt_map(self):
+        '''
+        Internal helper function to adopt a memory map grown by another process.
+
+        Returns: None, otherwise RuntimeError if txns of this process are open.
+        '''
+        with self.MAPLOCK:
+            if self._has_open_readers():
+                raise RuntimeError(
+                    '{} was resized by another process while transactions were open'.format(
+                        repr(self)))
+            self.DB.set_mapsize(0)
+            self.MSLIMIT = self.DB.info()['map_size']
+        return None
+
+    def _begin(self, write=False, buffers=False):
+        '''
+        Internal helper function to begin a txn, adopting a memory map grown
+        by another process.
+
+        write   - boolean, if True - begins a write txn
+                  (default=False)
+        buffers - boolean, if True - the txn returns memoryviews
+                  (default=False)
+
+        Returns: A txn.
+        '''
+        for retry in (True, False):
+            try:
+                if write:
+                    # Unlocked, may wait on a batch that reads
+                    return self.DB.begin(write=True, buffers=buffers)
+                with self.MAPLOCK:
+                    return self.DB.begin(buffers=buffers)
+            except lmdb.MapResizedError:
+                if not retry:
+                    raise
+                self._adopt_map()
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _joined_txn(txn):
+        '''
+        Internal helper function to use an active txn without ending it.
+        '''
+        yield txn
+
+    def _begin_write(self):
+        '''
+        Internal helper function to begin a write txn, or join the active
+        batch of calling thread.
+
+        Returns: A write txn context.
+        '''
+        txn = getattr(self.LOCAL, 'txn', None)
+        if txn is None:
+            return self._begin(write=True)
+        return ShareDB._joined_txn(txn)
+
+    def _evict_cached(self, key=None, packed=False):
         '''
-        Internal helper function to insert key-value pair via txn and trigger sync.
+        Internal helper function to invalidate cached values after a write.
 
-        key - object, a valid unpacked key to be inserted/updated
-        val - object, a valid unpacked value associated with given key
-        txn - function, a transaction interface for insertion
+        key    - object, a valid key to evict, if None - evict all
+                 (default=None)
+        packed - boolean, if True - will attempt packing key
+                 (default=False)
 
         Returns: None.
         '''
-        key = self._get_packed_key(key=key)
-        val = self._get_packed_val(val=val)
-        try:
-            txn.put(key=key, value=val, overwrite=True, append=False)
-        except lmdb.MapFullError:
-            raise MemoryError(
-                '{} is full'.format(str(self)))
-        except Exception as E:
-            raise TypeError(
-                'Given key={} of {} and value={} of {} raised: {}'.format(
-                    key, type(key), val, type(val), E))
-        self.BQSIZE += 1
-        self._trigger_sync()
+        if self.RCACHE:
+            if key is None:
+                self.RCACHE.clear()
+            else:
+                if not packed:
+                    key = self._get_packed_key(key=key)
+                self.RCACHE.pop(key, None)
         return None
 
+    @staticmethod
+    def _iter_chunks(items, chunk_size):
+        '''
+        Internal helper function to split items into chunks, each to be
+        processed via its own transaction.
+
+        items      - iterable, an iterable of items to split
+        chunk_size - integer, max no. of items per chunk, if None - a single
+                     chunk of all items
+
+        Returns: A generator of item chunks, otherwise TypeError.
+        '''
+        if chunk_size is None:
+            yield items
+            return
+        if not isinstance(chunk_size, numbers.Integral) or \
+           isinstance(chunk_size, bool) or chunk_size < 1:
+            raise TypeError(
+                'chunk_size={} of {} must be a positive integer'.format(
+                    chunk_size, type(chunk_size)))
+        items = iter(items)
+        chunk = list(itertools.islice(items, chunk_size))
+        while chunk:
+            yield chunk
+            chunk = list(itertools.islice(items, chunk_size))
+
+    def _pack_kv(self, key, val):
+        '''
+        Internal helper function to pack a (key, value) pair for insertion.
+
+        key - object, a valid key to be inserted/updated
+        val - object, a valid value associated with given key
+
+        Returns: A packed (key, value) pair, otherwise TypeError.
+        '''
+        # Pack (key, value) directly, skipping helper calls
+        try:
+            if key is None or val is None:
+                raise TypeError
+            return self.KEYP(key), self.VALP(val)
+        except Exception:
+            # Defer to helpers for a descriptive error
+            self._get_packed_key(key=key)
+            self._get_packed_val(val=val)
+            raise
+
+    def _iter_packed_kv(self, kv_iter):
+        '''
+        Internal helper function to stream packed (key, value) pairs for bulk insertion.
+
+        kv_iter - iterable, an iterable of valid (key, value) pairs
+
+        Returns: A generator of packed (key, value) pairs.
+        '''
+        # Bind packer locally for the entire batch
+        pack_kv = self._pack_kv
+        for key, val in kv_iter:
+            yield pack_kv(key=key, val=val)
+
     @alivemethod
+    @writemethod
     def set(self, key, val):
         '''
         User function to insert/overwrite a single (key, value) pair in to ShareDB
@@ -588,8 +1049,28 @@ class ShareDB(object):
         >>> myDB.drop()
         True
         '''
-        with self.DB.begin(write=True) as kvsetter:
-            self._insert_kv_in_txn(key=key, val=val, txn=kvsetter)
+        key_packed, val_packed = self._pack_kv(key=key, val=val)
+        for retry in (True, False):
+            try:
+                with self._begin_write() as kvsetter:
+                    try:
+                        kvsetter.put(key_packed, val_packed)
+                    except lmdb.MapFullError:
+                        raise MemoryError(
+                            '{} is full'.format(str(self)))
+                    except Exception as E:
+                        raise TypeError(
+                            'Given key={} of {} and value={} of {} raised: {}'.format(
+                                key, type(key), val, type(val), E))
+                break
+            except (MemoryError, lmdb.MapFullError):
+                # Commits may fill the map too
+                if not (retry and self._grow_map()):
+                    raise MemoryError(
+                        '{} is full'.format(str(self)))
+        self._evict_cached(key=key_packed, packed=True)
+        self.BQSIZE += 1
+        self._trigger_sync()
         return self
 
     def __setitem__(self, key, val):
@@ -620,12 +1101,19 @@ class ShareDB(object):
         return self.set(key=key, val=val)
 
     @alivemethod
-    def multiset(self, kv_iter):
+    @writemethod
+    def multiset(self, kv_iter, append=False):
         '''
         User function to insert/update multiple (key, value) pairs in to
         ShareDB instance via a single transaction.
 
         kv_iter - iterable, an iterable of valid (key, value) pairs
+        append  - boolean, if True - bulk load by appending each pair at the
+                  end of storage, requires keys strictly ascending in packed
+                  byte order and larger than all stored keys, otherwise
+                  nothing is inserted and ValueError is raised (inside
+                  a batch, only if the error leaves the batch)
+                  (default=False)
 
         Returns: self to ShareDB object.
 
@@ -661,22 +1149,69 @@ class ShareDB(object):
         >>> myDB[set(range(1))] = range(1)
         Traceback (most recent call last):
         TypeError: Given key={0} of <class 'set'>, raised: can not serialize 'set' object
+        >>> myDB.clear().multiset(kv_iter=((str(i), i) for i in range(10)), append=True).length()
+        10
+        >>> myDB.multiset(kv_iter=[('8', 0), ('9', 0)], append=True)
+        Traceback (most recent call last):
+        ValueError: Given kv_iter=[('8', 0), ('9', 0)] of <class 'list'>, has keys out of ascending order
+        >>> myDB['9']
+        9
+        >>> myDB.multiset(kv_iter=[('10', 10), ('11', set([11]))])
+        Traceback (most recent call last):
+        Exception: Given kv_iter=[('10', 10), ('11', {11})] of <class 'list'>, raised: Given value={11} of <class 'set'>, raised: can not serialize 'set' object
+        >>> '10' in myDB
+        False
         >>> myDB.drop()
         True
         '''
-        with self.DB.begin(write=True) as kvsetter:
+        kv_packed = self._iter_packed_kv(kv_iter=kv_iter)
+        # Sized inputs are packed up front, so that the write txn
+        # is held only for LMDB puts; streams stay lazy
+        if isinstance(kv_iter, collections.abc.Sized):
             try:
-                for key, val in kv_iter:
-                    self._insert_kv_in_txn(key=key, val=val, txn=kvsetter)
+                kv_packed = list(kv_packed)
             except Exception as E:
                 raise Exception(
                     'Given kv_iter={} of {}, raised: {}'.format(
                         kv_iter, type(kv_iter), E))
+        # Only pairs packed up front can be put again after growing
+        for retry in (isinstance(kv_packed, list), False):
+            try:
+                with self._begin_write() as kvsetter:
+                    with kvsetter.cursor() as kvcursor:
+                        try:
+                            consumed, added = kvcursor.putmulti(
+                                kv_packed,
+                                overwrite=True,
+                                append=bool(append))
+                        except lmdb.MapFullError:
+                            raise MemoryError(
+                                '{} is full'.format(str(self)))
+                        except Exception as E:
+                            raise Exception(
+                                'Given kv_iter={} of {}, raised: {}'.format(
+                                    kv_iter, type(kv_iter), E))
+                        # Appends out of order are skipped by LMDB, so abort txn
+                        if append and added < consumed:
+                            raise ValueError(
+                                'Given kv_iter={} of {}, has keys out of ascending order'.format(
+                                    kv_iter, type(kv_iter)))
+                break
+            except (MemoryError, lmdb.MapFullError):
+                # Commits may fill the map too
+                if not (retry and self._grow_map()):
+                    raise MemoryError(
+                        '{} is full'.format(str(self)))
+        self._evict_cached()
+        self.BQSIZE += added
+        self._trigger_sync()
         return self
 
     def _get_val_on_disk(self, key, txn, packed=False, default=None):
         '''
         Internal helper function to return the packed value associated with given key.
+        Under a buffers=True txn, the packed value is a memoryview valid only while
+        txn is alive.
 
         key     - object, a valid key to query for associated value
         txn     - function, a transaction interface for query
@@ -710,6 +1245,40 @@ class ShareDB(object):
             return default
         return self._get_unpacked_val(val)
 
+    def _get_cached_val(self, key, default=None):
+        '''
+        Internal helper function to return the unpacked value associated with given key
+        via the read cache, reading from disk on a miss. Packed values are cached, so
+        each hit unpacks a fresh object that callers may mutate freely.
+
+        key     - object, a valid key to query for associated value
+        default - object, a default value to return when key is absent
+                  (default=None)
+
+        Returns: Unpacked value corresponding to key, otherwise default.
+        '''
+        key = self._get_packed_key(key=key)
+        val = self.RCACHE.get(key)  # Values are never None
+        if val is not None:
+            try:
+                self.RCACHE.move_to_end(key)
+            except KeyError:  # Evicted by another thread meanwhile
+                pass
+            return self._get_unpacked_val(val=val)
+        with self._begin(write=False) as kvgetter:
+            val = self._get_val_on_disk(
+                key=key, txn=kvgetter, packed=True, default=None)
+        # Absent keys are not cached
+        if val is None:
+            return default
+        self.RCACHE[key] = val
+        if len(self.RCACHE) > self.RCSIZE:
+            try:
+                self.RCACHE.popitem(last=False)
+            except KeyError:  # Cleared by another thread meanwhile
+                pass
+        return self._get_unpacked_val(val=val)
+
     @alivemethod
     def get(self, key, default=None):
         '''
@@ -743,7 +1312,9 @@ class ShareDB(object):
         >>> myDB.drop()
         True
         '''
-        with self.DB.begin(write=False) as kvgetter:
+        if self.RCSIZE:
+            return self._get_cached_val(key=key, default=default)
+        with self._begin(write=False, buffers=True) as kvgetter:
             val = self._get_unpacked_val_on_disk(
                 key=key, txn=kvgetter, packed=False, default=default)
         return val
@@ -786,7 +1357,7 @@ class ShareDB(object):
     def multiget(self, key_iter, default=None):
         '''
         User function to iterate over values of multiple keys in ShareDB instance
-        via a single transaction.
+        via a short transaction per window of keys.
 
         key_iter - iterable, an iterable of valid keys to query for values
         default  - object, a default value to return when a key is absent
@@ -813,15 +1384,35 @@ class ShareDB(object):
         >>> myDB.drop()
         True
         '''
-        with self.DB.begin(write=False) as kvgetter:
-            try:
-                for key in key_iter:
-                    yield self._get_unpacked_val_on_disk(
-                        key=key, txn=kvgetter, packed=False, default=default)
-            except Exception as E:
-                raise Exception(
-                    'Given key_iter={} of {}, raised: {}'.format(
-                        key_iter, type(key_iter), E))
+        # Keys are fetched in windows, each in sorted (B+tree leaf) order
+        # via its own short read txn, so a slow consumer never pins an old
+        # snapshot; bytes values are fetched so that they outlive the txn
+        key_stream = iter(key_iter)
+        # Bind helpers locally for the entire stream
+        key_packer   = self._get_packed_key
+        val_unpacker = self._get_unpacked_val
+        try:
+            while True:
+                # Pack next window of keys
+                window = [key_packer(key=key) \
+                    for key in itertools.islice(key_stream, 4096)]
+                if not window:
+                    break
+                # Fetch window in a single sorted pass
+                with self._begin(write=False) as kvgetter:
+                    with kvgetter.cursor() as kvcursor:
+                        found = dict(kvcursor.getmulti(sorted(window)))
+                # Stream values in original order, outside the txn
+                for key in window:
+                    val = found.get(key)
+                    if val is None:
+                        yield default
+                    else:
+                        yield val_unpacker(val=val)
+        except Exception as E:
+            raise Exception(
+                'Given key_iter={} of {}, raised: {}'.format(
+                    key_iter, type(key_iter), E))
 
     @alivemethod
     def has_key(self, key):
@@ -849,7 +1440,7 @@ class ShareDB(object):
         >>> myDB.drop()
         True
         '''
-        with self.DB.begin(write=False) as kvgetter:
+        with self._begin(write=False, buffers=True) as kvgetter:
             val = self._get_val_on_disk(
                 key=key, txn=kvgetter, packed=False, default=None)
         if val is None:
@@ -921,19 +1512,19 @@ class ShareDB(object):
         >>> myDB.drop()
         True
         '''
-        with self.DB.begin(write=False) as kvgetter:
-            try:
-                for key in key_iter:
-                    val = self._get_val_on_disk(
-                        key=key, txn=kvgetter, packed=False, default=None)
-                    if val is None:
-                        yield False
-                    else:
-                        yield True
-            except Exception as E:
-                raise Exception(
-                    'Given key_iter={} of {}, raised: {}'.format(
-                        key_iter, type(key_iter), E))
+        # Bind helpers locally for the entire stream
+        key_packer = self._get_packed_key
+        # One cursor probes every key, without fetching any value
+        with self._begin(write=False, buffers=True) as kvgetter:
+            with kvgetter.cursor() as kvcursor:
+                key_finder = kvcursor.set_key
+                try:
+                    for key in key_iter:
+                        yield key_finder(key_packer(key=key))
+                except Exception as E:
+                    raise Exception(
+                        'Given key_iter={} of {}, raised: {}'.format(
+                            key_iter, type(key_iter), E))
 
     @alivemethod
     def length(self):
@@ -953,7 +1544,13 @@ class ShareDB(object):
         >>> myDB.drop()
         True
         '''
-        return int(self.DB.stat()['entries'])
+        try:
+            with self.MAPLOCK:
+                return self.DB.stat()['entries']
+        except lmdb.MapResizedError:
+            self._adopt_map()
+            with self.MAPLOCK:
+                return self.DB.stat()['entries']
 
     def __len__(self):
         '''
@@ -982,40 +1579,44 @@ class ShareDB(object):
         '''
         return self.length()
 
-    def _del_pop_from_disk(self, key, txn, opr, packed=False):
+    def _del_kv_in_txn(self, key, txn, packed=False):
         '''
-        Internal helper function to delete/pop (key, value) pair via txn
-        and trigger sync.
+        Internal helper function to delete (key, value) pair via txn.
 
         key    - object, a candidate key to remove
-        txn    - function, a transaction interface for delete/pop
-        opr    - string, must be 'del' or 'pop' specifying the operation
+        txn    - function, a transaction interface for deletion
         packed - boolean, if True - will attempt packing key
                  (default=False)
 
-        Returns: Unpacked value corresponding to key.
+        Returns: None.
         '''
         if not packed:
             key = self._get_packed_key(key=key)
-        if opr == 'del':
-            txn.delete(key=key)
-            val = None
-        elif opr == 'pop':
-            try:
-                val = self._get_unpacked_val(val=txn.pop(key=key))
-            except:
-                key = self._get_unpacked_key(key=key)
-                raise KeyError(
-                    'key={} of {} is absent'.format(
-                        key, type(key)))
-        else:
-            raise ValueError(
-                'opr must be \'del\' or \'pop\' not {}'.format(opr))
-        self.BQSIZE += 1
-        self._trigger_sync()
-        return val
+        txn.delete(key=key)
+        return None
+
+    def _pop_kv_in_txn(self, key, txn):
+        '''
+        Internal helper function to pop (key, value) pair via txn.
+
+        key - object, a valid key to be popped
+        txn - function, a transaction interface for popping
+
+        Returns: Unpacked value corresponding to key, otherwise KeyError.
+        '''
+        key_packed = self._get_packed_key(key=key)
+        try:
+            val_packed = txn.pop(key=key_packed)
+        except lmdb.Error:
+            val_packed = None
+        if val_packed is None:
+            raise KeyError(
+                'key={} of {} is absent'.format(
+                    key, type(key)))
+        return self._get_unpacked_val(val=val_packed)
 
     @alivemethod
+    @writemethod
     def remove(self, key):
         '''
         User function to remove a single key from ShareDB instance.
@@ -1040,9 +1641,12 @@ class ShareDB(object):
         >>> myDB.drop()
         True
         '''
-        with self.DB.begin(write=True) as keydeler:
-            self._del_pop_from_disk(
-                key=key, txn=keydeler, opr='del', packed=False)
+        with self._begin_write() as keydeler:
+            self._del_kv_in_txn(
+                key=key, txn=keydeler, packed=False)
+        self._evict_cached(key=key)
+        self.BQSIZE += 1
+        self._trigger_sync()
         return self
 
     def __delitem__(self, key):
@@ -1072,12 +1676,16 @@ class ShareDB(object):
         return self.remove(key=key)
 
     @alivemethod
-    def multiremove(self, key_iter):
+    @writemethod
+    def multiremove(self, key_iter, chunk_size=None):
         '''
         User function to remove mutiple keys from ShareDB instance via a
         single transaction.
 
-        key_iter - iterable, an iterable of candidate keys to remove
+        key_iter   - iterable, an iterable of candidate keys to remove
+        chunk_size - integer, if given - commits every chunk_size keys in
+                     a separate transaction to bound the size of each
+                     (default=None)
 
         Returns: self to ShareDB object.
 
@@ -1090,6 +1698,18 @@ class ShareDB(object):
         >>> myDB.close()
         True
         >>> myDB = ShareDB(path='./test_multiremove.ShareDB', reset=False)
+        >>> myDB.multiremove(range(50, 150)).length()
+        50
+        >>> myDB.multiremove([0, None])
+        Traceback (most recent call last):
+        TypeError: ShareDB cannot use <class 'NoneType'> objects as keys
+        >>> myDB.multiremove([25, 25, 26], chunk_size=1).length()
+        48
+        >>> myDB.multiremove(range(25), chunk_size=10).length()
+        23
+        >>> myDB.multiremove(range(100), chunk_size=0)
+        Traceback (most recent call last):
+        TypeError: chunk_size=0 of <class 'int'> must be a positive integer
         >>> myDB.multiremove(range(100)).length()
         0
         >>> 0 in myDB
@@ -1097,18 +1717,27 @@ class ShareDB(object):
         >>> myDB.drop()
         True
         '''
-        with self.DB.begin(write=True) as keydeler:
-            try:
-                for key in key_iter:
-                    self._del_pop_from_disk(
-                        key=key, txn=keydeler, opr='del', packed=False)
-            except Exception as E:
-                raise Exception(
-                    'Given key_iter={} of {}, raised: {}'.format(
-                        key_iter, type(key_iter), E))
+        # Pack all unique keys before the write txn, sorted for page locality
+        key_packer  = self._get_packed_key
+        packed_keys = sorted({key_packer(key=key) for key in key_iter})
+        # Delete in a single cursor pass per chunk
+        deleted = 0
+        for key_chunk in self._iter_chunks(packed_keys, chunk_size):
+            with self._begin_write() as keydeler:
+                with keydeler.cursor() as keycursor:
+                    key_finder  = keycursor.set_key
+                    key_deleter = keycursor.delete
+                    for key in key_chunk:
+                        if key_finder(key):
+                            key_deleter()
+                            deleted += 1
+        self._evict_cached()
+        self.BQSIZE += deleted
+        self._trigger_sync()
         return self
 
     @alivemethod
+    @writemethod
     def pop(self, key):
         '''
         User function to pop a single key from ShareDB instance and
@@ -1139,18 +1768,24 @@ class ShareDB(object):
         >>> myDB.drop()
         True
         '''
-        with self.DB.begin(write=True) as keypopper:
-            val = self._del_pop_from_disk(
-                key=key, txn=keypopper, opr='pop', packed=False)
+        with self._begin_write() as keypopper:
+            val = self._pop_kv_in_txn(key=key, txn=keypopper)
+        self._evict_cached(key=key)
+        self.BQSIZE += 1
+        self._trigger_sync()
         return val
 
     @alivemethod
-    def multipop(self, key_iter):
+    @writemethod
+    def multipop(self, key_iter, chunk_size=None):
         '''
         User function to pop multiple keys from ShareDB instance via a single
         transaction and iterate over their values.
 
-        key_iter - iterable, an iterable of valid keys to be popped
+        key_iter   - iterable, an iterable of valid keys to be popped
+        chunk_size - integer, if given - commits every chunk_size keys in
+                     a separate transaction to bound the size of each
+                     (default=None)
 
         Returns: A generator of unpacked values, otherwise KeyError.
 
@@ -1170,22 +1805,31 @@ class ShareDB(object):
         24
         >>> len(myDB)
         75
+        >>> sum(1 for _ in myDB.multipop(range(74, 100), chunk_size=10))
+        26
+        >>> len(myDB)
+        49
         >>> pop_iter = myDB.multipop([199, 200])
         >>> next(pop_iter)
         Traceback (most recent call last):
-        Exception: Given key_iter=[199, 200] of <class 'list'>, raised: "key=199 of <class 'int'> is absent"
+        KeyError: "key=199 of <class 'int'> is absent"
         >>> myDB.drop()
         True
         '''
-        with self.DB.begin(write=True) as keypopper:
+        key_popper = self._pop_kv_in_txn
+        for key_chunk in self._iter_chunks(key_iter, chunk_size):
+            popped = 0
             try:
-                for key in key_iter:
-                    yield self._del_pop_from_disk(
-                        key=key, txn=keypopper, opr='pop', packed=False)
-            except Exception as E:
-                raise Exception(
-                    'Given key_iter={} of {}, raised: {}'.format(
-                        key_iter, type(key_iter), E))
+                with self._begin_write() as keypopper:
+                    for key in key_chunk:
+                        yield key_popper(key=key, txn=keypopper)
+                        popped += 1
+            finally:
+                # Committed chunks must leave the cache, even if a
+                # later chunk fails or iteration stops early
+                self._evict_cached()
+            self.BQSIZE += popped
+            self._trigger_sync()
 
     def _iter_on_disk_kv(self, yield_key=False, unpack_key=False, yield_val=False, unpack_val=False):
         '''
@@ -1220,22 +1864,83 @@ class ShareDB(object):
         if not any([yield_key, yield_val]):
             raise ValueError(
                 'Both yield_key and yield_val to ._iter_on_disk_kv() are False or None')
-        with self.DB.begin(write=False) as kviter:
+        # Decide the specialized stream once, not per row
+        if yield_key and yield_val:
+            return self._iter_on_disk_items(
+                unpack_key=unpack_key, unpack_val=unpack_val)
+        if yield_key:
+            return self._iter_on_disk_keys(unpack_key=unpack_key)
+        return self._iter_on_disk_vals(unpack_val=unpack_val)
+
+    def _get_stream_unpacker(self, values=False):
+        '''
+        Internal helper function to return an unpacker for a single stream of packed
+        keys or values. For msgpack, each item is fed to a private Unpacker, which
+        skips the per-call argument parsing of unpackb; the unpacker must not be
+        shared across streams.
+
+        values - boolean, if True - will unpack values, otherwise keys
+                 (default=False)
+
+        Returns: A function unpacking one packed key or value.
+        '''
+        if self.SERIAL != 'msgpack' or (values and self.COMPRESS):
+            return self._get_unpacked_val if values else self._get_unpacked_key
+        # Lift the default 100 MiB cap, so any value unpackb reads also streams
+        stream = msgpack.Unpacker(raw=False, use_list=True, max_buffer_size=0)
+        feed, unpack = stream.feed, stream.unpack
+        def stream_unpacker(item):
+            feed(item)
+            return unpack()
+        return stream_unpacker
+
+    def _iter_on_disk_keys(self, unpack_key=False):
+        '''
+        Internal helper function to iterate over keys in ShareDB.
+
+        unpack_key - boolean, if True will unpack keys,
+                     otherwise packed keys are copied out of the map
+
+        Returns: A generator of (un)packed keys.
+        '''
+        key_unpacker = self._get_stream_unpacker() if unpack_key else bytes
+        with self._begin(write=False, buffers=True) as kviter:
+            with kviter.cursor() as kvcursor:
+                for key in kvcursor.iternext(keys=True, values=False):
+                    yield key_unpacker(key)
+
+    def _iter_on_disk_vals(self, unpack_val=False):
+        '''
+        Internal helper function to iterate over values in ShareDB.
+
+        unpack_val - boolean, if True will unpack values,
+                     otherwise packed values are copied out of the map
+
+        Returns: A generator of (un)packed values.
+        '''
+        val_unpacker = self._get_stream_unpacker(values=True) if unpack_val else bytes
+        with self._begin(write=False, buffers=True) as kviter:
+            with kviter.cursor() as kvcursor:
+                for val in kvcursor.iternext(keys=False, values=True):
+                    yield val_unpacker(val)
+
+    def _iter_on_disk_items(self, unpack_key=False, unpack_val=False):
+        '''
+        Internal helper function to iterate over (key, value) pairs in ShareDB.
+
+        unpack_key - boolean, if True will unpack keys,
+                     otherwise packed keys are copied out of the map
+        unpack_val - boolean, if True will unpack values,
+                     otherwise packed values are copied out of the map
+
+        Returns: A generator of (un)packed (key, value) pairs.
+        '''
+        key_unpacker = self._get_stream_unpacker() if unpack_key else bytes
+        val_unpacker = self._get_stream_unpacker(values=True) if unpack_val else bytes
+        with self._begin(write=False, buffers=True) as kviter:
             with kviter.cursor() as kvcursor:
                 for key, val in kvcursor:
-                    # Unpack key
-                    if unpack_key:
-                        key = self._get_unpacked_key(key=key)
-                    # Unpack value
-                    if unpack_val:
-                        val = self._get_unpacked_val(val=val)
-                    # Stream keys and values
-                    if yield_key and not yield_val:
-                        yield key
-                    elif yield_val and not yield_key:
-                        yield val
-                    elif yield_key and yield_val:
-                        yield key, val
+                    yield key_unpacker(key), val_unpacker(val)
 
     @alivemethod
     def items(self):
@@ -1339,12 +2044,13 @@ class ShareDB(object):
         return self._iter_on_disk_kv(yield_val=True, unpack_val=True)
 
     @alivemethod
+    @writemethod
     def popitem(self):
         '''
         User function to pop a single (key, value) pair in ShareDB
         instance.
 
-        Returns: A popped unpacked (key, value) pair.
+        Returns: A popped unpacked (key, value) pair, otherwise KeyError if empty.
 
         popitem test cases.
 
@@ -1356,18 +2062,27 @@ class ShareDB(object):
         >>> myDB = ShareDB(path='./test_popitem', reset=False)
         >>> myDB.popitem()
         (10, 100)
+        >>> myDB.clear().popitem()
+        Traceback (most recent call last):
+        KeyError: 'popitem(): ShareDB is empty'
         >>> myDB.drop()
         True
         '''
-        curr_key = self._iter_on_disk_kv(yield_key=True, unpack_key=False)
-        item_key = next(curr_key)
-        with self.DB.begin(write=True) as itempopper:
-            key, val = self._get_unpacked_key(key=item_key), \
-                       self._del_pop_from_disk(
-                            key=item_key, txn=itempopper, opr='pop', packed=True)
+        with self._begin_write() as itempopper:
+            with itempopper.cursor() as kvcursor:
+                if not kvcursor.first():
+                    raise KeyError('popitem(): ShareDB is empty')
+                item_key, item_val = kvcursor.item()
+                kvcursor.delete()
+        key, val = self._get_unpacked_key(key=item_key), \
+                   self._get_unpacked_val(val=item_val)
+        self._evict_cached()
+        self.BQSIZE += 1
+        self._trigger_sync()
         return key, val
 
     @alivemethod
+    @writemethod
     def multipopitem(self, num_items=1):
         '''
         User function to iterate over multiple popped (key, value) pairs
@@ -1407,30 +2122,82 @@ class ShareDB(object):
                 'num_items={} of {} must be an integer/long/float'.format(
                     num_items, type(num_items)))
 
-        # Iterate over ShareDB and load num_item keys in packed state
-        num_items = min(num_items, self.length()) # safe upper limit
-        curr_key  = self._iter_on_disk_kv(yield_key=True, unpack_key=False)
-        item_keys = []
-        while len(item_keys) < num_items:
-            item_keys.append(next(curr_key))
-
-        # Pop packed keys in item_keys, and yield the unapacked items
-        with self.DB.begin(write=True) as itempopper:
-            for item_key in item_keys:
-                yield self._get_unpacked_key(key=item_key), \
-                    self._del_pop_from_disk(
-                        key=item_key, txn=itempopper, opr='pop', packed=True)
+        # Pop leading items off a cursor in a single write transaction,
+        # delete moves the cursor along so first() is always the next one
+        key_unpacker = self._get_unpacked_key
+        val_unpacker = self._get_unpacked_val
+        popped = 0
+        with self._begin_write() as itempopper:
+            with itempopper.cursor() as kvcursor:
+                while popped < num_items and kvcursor.first():
+                    item_key, item_val = kvcursor.item()
+                    kvcursor.delete()
+                    popped += 1
+                    yield key_unpacker(key=item_key), \
+                          val_unpacker(val=item_val)
+        self._evict_cached()
+        self.BQSIZE += popped
+        self._trigger_sync()
 
     @alivemethod
     def sync(self):
         '''
         User function to flush all commits to ShareDB instance on disk.
+        The flush is forced, irrespective of sync_mode, and skipped when readonly.
 
         Returns: self to ShareDB object.
         '''
-        self.DB.sync()
+        if not self.READONLY:
+            self.DB.sync(True)
         return self
 
+    @alivemethod
+    @writemethod
+    @contextlib.contextmanager
+    def batch(self):
+        '''
+        User context manager to group all writes made by calling thread in
+        to a single transaction, committed on exit, or discarded if an
+        exception is raised. Reads inside a batch see only committed data,
+        and other writers wait until the batch ends. Writes joining a batch
+        are not undone on their own, so a multiset or multipop error caught
+        inside the batch keeps the items it already wrote or popped, and
+        these are committed with the batch.
+
+        Returns: self to ShareDB object.
+
+        batch test cases.
+
+        >>> myDB = ShareDB(path='./test_batch', reset=True)
+        >>> with myDB.batch():
+        ...     for i in range(100): myDB[i] = i**2
+        ...     len(myDB)
+        0
+        >>> len(myDB)
+        100
+        >>> with myDB.batch():
+        ...     del myDB[0]
+        ...     raise ValueError('discard')
+        Traceback (most recent call last):
+        ValueError: discard
+        >>> len(myDB)
+        100
+        >>> myDB.drop()
+        True
+        '''
+        # Nested batches join the outermost one
+        if getattr(self.LOCAL, 'txn', None) is not None:
+            yield self
+            return
+        try:
+            with self._begin(write=True) as kvbatcher:
+                self.LOCAL.txn = kvbatcher
+                yield self
+        finally:
+            self.LOCAL.txn = None
+            # Values read during batch may predate it
+            self._evict_cached()
+
     def _delete_keys_and_db(self, drop_DB):
         '''
         Internal helper function to delete keys and drop database.
@@ -1439,11 +2206,12 @@ class ShareDB(object):
 
         Returns: self to ShareDB object.
         '''
-        with self.DB.begin(write=True) as dropper:
+        with self._begin_write() as dropper:
             to_drop = self.DB.open_db()
             dropper.drop(db=to_drop, delete=drop_DB)
 
     @alivemethod
+    @writemethod
     def clear(self):
         '''
         User function to remove all data stored in ShareDB instance.
@@ -1472,6 +2240,7 @@ class ShareDB(object):
         True
         '''
         self._delete_keys_and_db(drop_DB=False)
+        self._evict_cached()
         return self
 
     def close(self):
@@ -1512,6 +2281,7 @@ class ShareDB(object):
             return True
         return False
 
+    @writemethod
     def drop(self):
         '''
         User function to delete a ShareDB instance.
@@ -1,10 +1,12 @@
 from ShareDB         import ShareDB
-from multiprocessing import Process, cpu_count
+from multiprocessing import Process, Queue, cpu_count
 from itertools       import chain
 
 import numpy as np
 import time
 import shutil
+import os
+import threading
 
 
 '''
@@ -33,15 +35,18 @@ def stream_tasks(inDB_path, num_task, num_proc):
         compress=True,      # Serialized msgpack-ed lists are further compressed
         map_size=5*10**8)   # And we estimate to require ~500MB for results
 
+    # PCG64 generator, freshly seeded from OS entropy
+    rng = np.random.default_rng()
+
     # Queue all work
     current_token = 0
     while current_token < num_task:
         # Choose vector size
-        base_size = np.random.randint(10**4, 10**5)
+        base_size = int(rng.integers(10**4, 10**5))
 
         # Generate vectors
-        X = tuple(int(v) for v in np.random.randint(100, size=(1, base_size))[0])
-        Y = tuple(int(v) for v in np.random.randint(100, size=(1, base_size))[0])
+        X = tuple(rng.integers(100, size=base_size).tolist())
+        Y = tuple(rng.integers(100, size=base_size).tolist())
 
         # Write to inDB
         inDB[current_token] = (X, Y)
@@ -62,15 +67,30 @@ def stream_task_token(exec_id, num_task, num_proc):
         yield i
         i += num_proc
 
-def para_conv(inDB_path, outDB_path, exec_id, num_task, num_proc):
+def stream_logs(log_queue):
+    '''
+    This procedure prints log lines sent by all executors, so that
+    they do not contend on stdout. It ends when None is received.
+    '''
+    for line in iter(log_queue.get, None):
+        print(line)
+
+def para_conv(inDB_path, outDB_path, exec_id, num_task, num_proc, log_queue):
     '''
     This procedure computes the convolution of vector pairs stored in a
     ShareDB instance located at inDB_path, and writes the results in a
     ShareDB instance located in outDB_path. The procedure ends when
     no more tasks are available and a relevant task end token is found.
+    All logs are sent to log_queue.
     '''
+    # Pin executor to a distinct CPU (Linux only), so it is not migrated
+    # away from the memory map pages it faults in
+    if hasattr(os, 'sched_setaffinity'):
+        cpus = sorted(os.sched_getaffinity(0))
+        os.sched_setaffinity(0, {cpus[exec_id % len(cpus)]})
+
     # Open inDB to read vector pairs
-    inDB = ShareDB(path=inDB_path)
+    inDB = ShareDB(path=inDB_path, readonly=True)
 
     # Open outDB to write convolution results
     outDB = ShareDB(
@@ -87,20 +107,20 @@ def para_conv(inDB_path, outDB_path, exec_id, num_task, num_proc):
     # Get vector pairs
     for X, Y in inDB.multiget(key_iter):
         # Log execution initation
-        print('EXECUTING WORK # {}'.format(current_token))
+        log_queue.put('EXECUTING WORK # {}'.format(current_token))
 
         # Actual execution
         result = tuple(int(v) for v in np.convolve(X, Y)) # Compute and store result in a list
         outDB[current_token] = result    # Insert compressed result in outDB
 
         # Log execution computation
-        print('COMPLETED WORK # {}'.format(current_token))
+        log_queue.put('COMPLETED WORK # {}'.format(current_token))
 
         # Update token for logging
         current_token += num_proc
 
     # Log executor completion
-    print('EXECUTOR # {} COMPLETED'.format(exec_id))
+    log_queue.put('EXECUTOR # {} COMPLETED'.format(exec_id))
 
     # Time to close outDB ... we're done!
     outDB.close()
@@ -164,6 +184,11 @@ def main():
     # Log execution starting time
     t0 = time.time()
 
+    # Fire logger for executors
+    log_queue = Queue()
+    logger    = threading.Thread(target=stream_logs, args=(log_queue,))
+    logger.start()
+
     # Fire task executors
     task_executors = []
     outDB_paths    = []
@@ -172,7 +197,7 @@ def main():
         outDB_paths.append(outDB_path)
         task_executor = Process(
             target=para_conv, args=(
-                inDB_path, outDB_path, exec_id, num_task, num_proc))
+                inDB_path, outDB_path, exec_id, num_task, num_proc, log_queue))
         task_executors.append(task_executor)
         task_executor.start()
 
@@ -180,6 +205,10 @@ def main():
     for task_executor in task_executors:
         task_executor.join()
 
+    # Stop logger
+    log_queue.put(None)
+    logger.join()
+
     # Log elapsed time
     print('\nTask Execution = {} seconds\n'.format(time.time()-t0))
 
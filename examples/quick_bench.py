@@ -1,41 +1,88 @@
 from ShareDB import ShareDB
 
+import numpy as np
+import itertools
+import threading
+import queue
 import time
 
 
-def write_thp(store_path, num_items, length):
+# DNA alphabet for random keys
+DNA = np.frombuffer(b'ATGC', dtype=np.uint8)
+
+
+def get_strings(rng, num, length):
+    '''
+    Return num random DNA strings of given length.
+    '''
+    idx = rng.integers(0, 4, size=(num, length), dtype=np.uint8)
+    raw = DNA[idx].tobytes().decode('ascii')
+    return [raw[i*length:(i+1)*length] for i in range(num)]
+
+def stream_batches(rng, num_items, length, batch_size, batch_queue):
     '''
-    Fill store with random DNA strings and report throughput.
+    Queue batches of random (key, value) pairs, ending with None.
+    '''
+    i = 0
+    while i < num_items:
+        keys = get_strings(rng, min(batch_size, num_items-i), length)
+        # Pair every key with the same constant value object
+        batch_queue.put((len(keys), zip(keys, itertools.repeat(1))))
+        i += len(keys)
+    batch_queue.put(None)
+
+def write_thp(store_path, num_items, length, batch_size=10000, seed=0):
+    '''
+    Fill store in batches via multiset and report throughput.
     '''
     kvStore = ShareDB(
         store_path,
         True,
         'msgpack', 
-        map_size=num_items*100)
-    i  = 1.
-    tt = 0.0
-    while i <= num_items:
-        t0  = time.time()
-        kvStore[i] = 1
-        tt += time.time() - t0
+        map_size=num_items*length*10,
+        sync_mode='nosync_unsafe') # Scratch store, flushed once on close
+    rng = np.random.default_rng(seed)
+    # Keys are generated in a producer thread, off the commit path
+    batch_queue = queue.Queue(maxsize=8)
+    producer    = threading.Thread(
+        target=stream_batches,
+        args=(rng, num_items, length, batch_size, batch_queue))
+    producer.start()
+    i  = 0
+    t0 = time.monotonic()
+    while True:
+        # Each batch is committed via a single transaction
+        batch = batch_queue.get()
+        if batch is None:
+            break
+        size, kv_iter = batch
+        kvStore.multiset(kv_iter)
+        i  += size
+        tt  = time.monotonic() - t0
         print('WRITER thp @ {:.2f} wt/sec | FILL {:.2f}%'.format(
             i / tt, (100. * i) / num_items))
-        i += 1
+    producer.join()
+    kvStore.close()
 
-def read_thp(store_path):
+def read_thp(store_path, num_items, length, batch_size=10000, seed=0):
     '''
     Go through store and report reading throughput.
     '''
     kvStore = ShareDB(store_path)
-    i  = 1.
+    # Same seed and batches regenerate the written keys
+    rng = np.random.default_rng(seed)
+    i  = 0
     tt = 0.0
-    while i <= len(kvStore):
-        t0  = time.time()
-        val = kvStore[i]
-        tt += time.time() - t0
+    while i < num_items:
+        # Each batch is fetched via sorted cursor windows
+        batch = get_strings(rng, min(batch_size, num_items-i), length)
+        t0  = time.monotonic()
+        for val in kvStore.multiget(batch):
+            pass
+        tt += time.monotonic() - t0
+        i  += len(batch)
         print('READER thp @ {:.2f} rd/sec | SCAN {:.2f}%'.format(
-            i / tt, (100. * i) / len(kvStore)))
-        i += 1
+            i / tt, (100. * i) / num_items))
 
 def main():
     store_path = './kvStore'
@@ -43,9 +90,9 @@ def main():
     length     = 25
     write_thp(store_path, num_items, length)
     print('\n')
-    read_thp(store_path)
+    read_thp(store_path, num_items, length)
     ShareDB(store_path).drop()
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
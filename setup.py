@@ -15,7 +15,7 @@ setup(
     name='ShareDB',
 
     # Link: https://www.python.org/dev/peps/pep-0440/#version-scheme
-    version='1.1.4',
+    version='1.2.0',
 
     description="An on-disk pythonic embedded key-value store for compressed data storage and distributed data analysis.",
 
@@ -48,7 +48,6 @@ setup(
         # that you indicate whether you support Python 2, Python 3 or both.
         # These classifiers are *not* checked by 'pip install'. See instead
         # 'python_requires' below.
-        'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3.6',
         'Programming Language :: Python :: 3.7',
         'Programming Language :: Python :: 3.8',
@@ -61,9 +60,14 @@ setup(
 
     packages=['ShareDB'],
 
-    python_requires='>=2.7, !=3.0.*, !=3.1.*, !=3.2.*, !=3.3.*, !=3.4.*, !=3.5.*, <4',
+    python_requires='>=3.6, <4',
 
-    install_requires=['lmdb>=0.98', 'msgpack>=0.6.2', 'configparser>=4.0.2', 'pytest-cov>=2.8.1'],
+    install_requires=['lmdb>=1.1.0', 'msgpack>=1.0.0', 'pytest-cov>=2.8.1'],
+
+    extras_require={
+        'msgspec': ['msgspec>=0.18'],
+        'zstd': ['zstandard>=0.15'],
+        'lz4': ['lz4>=3.0']},
 
     project_urls={  # Optional
         'Bug Reports': 'https://github.com/ayaanhossain/ShareDB/issues',
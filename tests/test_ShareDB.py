@@ -1,7 +1,11 @@
 from ShareDB import ShareDB
 
+import sys
 import random
 import string
+import pathlib
+import threading
+import multiprocessing
 import pytest
 
 
@@ -43,6 +47,11 @@ def test_ShareDB_init_param_fails():
             readers='XYZ',
             buffer_size=100,
             map_size=0)
+    with pytest.raises(TypeError) as error:
+        myDB = ShareDB(
+            path='./test_init.ShareDB',
+            reset=True,
+            sync_mode='fast')
     myDB = ShareDB(path='./test_init.ShareDB', reset=True)
     myDB.drop()
 
@@ -85,6 +94,376 @@ def test_close_drop():
     with pytest.raises(RuntimeError) as error:
         myDB[1] = 2
 
+def test_ShareDB_bad_reset():
+    '''
+    Test failed resets leave existing instance intact.
+    '''
+    myDB = ShareDB(path='./test_bad_reset', reset=True)
+    myDB.multiset((i, i) for i in range(10))
+    assert myDB.close() == True
+    with pytest.raises(TypeError) as error:
+        myDB = ShareDB(path='./test_bad_reset', reset=True, serial='something_fancy')
+    with pytest.raises(TypeError) as error:
+        myDB = ShareDB(path='./test_bad_reset', reset=True, cache_size=-1)
+    with pytest.raises(TypeError) as error:
+        myDB = ShareDB(path='./test_bad_reset', reset=True, cache_size='abc')
+    myDB = ShareDB(path='./test_bad_reset')
+    assert len(myDB) == 10
+    assert myDB.drop() == True
+
+def test_ShareDB_pathlike():
+    '''
+    Test path-like objects are accepted as path.
+    '''
+    myDB = ShareDB(path=pathlib.Path('./test_pathlike'), reset=True)
+    assert myDB.PATH == 'test_pathlike.ShareDB/'
+    assert myDB.drop() == True
+
+def test_legacy_config():
+    '''
+    Test instances with INI text configuration still open.
+    '''
+    myDB = ShareDB(path='./test_legacy_config', reset=True, serial='msgpack', compress=True)
+    myDB.multiset((i, [i]) for i in range(10))
+    assert myDB.close() == True
+
+    # Rewrite configuration as INI text, without SYNCMODE
+    with open('./test_legacy_config.ShareDB/ShareDB.config', 'w') as config_file:
+        config_file.write('\n'.join([
+            '[ShareDB Config]',
+            'serial = msgpack',
+            'compress = True',
+            'readers = 40',
+            'bcsize = 100',
+            'mslimit = 1000000']))
+    myDB = ShareDB(path='./test_legacy_config')
+    assert (myDB.SERIAL, myDB.COMPRESS, myDB.READERS) == ('msgpack', True, 40)
+    assert (myDB.BCSIZE, myDB.MSLIMIT, myDB.SYNCMODE) == (100, 1000000, 'safe')
+    assert myDB[9] == [9]
+    assert myDB.drop() == True
+
+def test_mixed_case_params():
+    '''
+    Test mixed-case serial and compress are accepted as stored.
+    '''
+    myDB = ShareDB(path='./test_mixed_case', reset=True, serial='MsgPack', compress='TRUE')
+    assert (myDB.SERIAL, myDB.COMPRESS) == ('msgpack', True)
+    myDB[(1, 'a')] = [1, 'a']
+    assert myDB[(1, 'a')] == [1, 'a']
+    assert myDB.drop() == True
+
+def test_large_value_iteration():
+    '''
+    Test streamed iteration over values beyond default msgpack limits.
+    '''
+    myDB = ShareDB(path='./test_large_value', reset=True, serial='msgpack')
+    large_val = [b'ACGT'*(2**25), list(range(2**18))]
+    myDB.multiset([(0, large_val), (1, 'small')])
+    assert myDB[0] == large_val
+    assert list(myDB.values()) == [large_val, 'small']
+    assert list(myDB.items()) == [(0, large_val), (1, 'small')]
+    assert myDB.drop() == True
+
+def test_sync_mode():
+    '''
+    Test sync_mode persistence across reopens.
+    '''
+    myDB = ShareDB(path='./test_sync_mode', reset=True, sync_mode='nosync_unsafe')
+    assert myDB.SYNCMODE == 'nosync_unsafe'
+    myDB.multiset((i, i**2) for i in range(100))
+    assert myDB.close() == True
+
+    # Reopened instance retains durability tier
+    myDB = ShareDB(path='./test_sync_mode')
+    assert myDB.SYNCMODE == 'nosync_unsafe'
+    assert len(myDB) == 100
+    assert myDB.drop() == True
+
+    # Only 'nosync_unsafe' skips flushing commits
+    assert ShareDB._get_sync_flags('safe') == (True, True)
+    assert ShareDB._get_sync_flags('nosync_safe') == (True, False)
+    assert ShareDB._get_sync_flags('nosync_unsafe') == (False, False)
+
+def test_msgspec_serial():
+    '''
+    Test msgspec serialization round trips.
+    '''
+    pytest.importorskip('msgspec')
+    myDB = ShareDB(path='./test_msgspec', reset=True, serial='msgspec', compress=True)
+    myDB.multiset(((i, str(i)), [i, {'v': i**2}]) for i in range(100))
+    assert myDB.close() == True
+
+    # Reopened instance retains serialization
+    myDB = ShareDB(path='./test_msgspec')
+    assert myDB.SERIAL == 'msgspec'
+    assert myDB[(7, '7')] == [7, {'v': 49}]
+    assert sorted(myDB.keys())[:2] == [[0, '0'], [1, '1']]
+    with pytest.raises(TypeError) as error:
+        myDB[None] = 0
+    assert myDB.drop() == True
+
+def test_zstd_compress():
+    '''
+    Test zstd value compression round trips.
+    '''
+    pytest.importorskip('zstandard')
+    myDB = ShareDB(path='./test_zstd', reset=True, serial='msgpack', compress='zstd')
+    myDB.multiset((i, 'ACGT'*i) for i in range(100))
+    assert myDB.close() == True
+
+    # Reopened instance retains compressor
+    myDB = ShareDB(path='./test_zstd')
+    assert myDB.COMPRESS == 'zstd'
+    assert myDB[99] == 'ACGT'*99
+    assert list(myDB.values())[:3] == ['', 'ACGT', 'ACGTACGT']
+    assert myDB.drop() == True
+
+    # Unknown compressors are rejected
+    with pytest.raises(TypeError) as error:
+        ShareDB(path='./test_zstd', reset=True, compress='bzip2')
+
+def test_lz4_compress():
+    '''
+    Test lz4 value compression round trips.
+    '''
+    pytest.importorskip('lz4')
+    myDB = ShareDB(path='./test_lz4', reset=True, serial='pickle', compress='lz4')
+    myDB.multiset((i, {'seq': 'ACGT'*i}) for i in range(100))
+    assert myDB.close() == True
+
+    # Reopened instance retains compressor
+    myDB = ShareDB(path='./test_lz4')
+    assert myDB.COMPRESS == 'lz4'
+    assert myDB[99] == {'seq': 'ACGT'*99}
+    assert myDB.popitem() == (0, {'seq': ''})
+    assert myDB.drop() == True
+
+def test_map_flags():
+    '''
+    Test memory map tuning flags against default instance.
+    '''
+    myDB = ShareDB(path='./test_map_flags', reset=True,
+        readahead=True, writemap=False, map_async=False, meminit=False)
+    myDB.multiset((i, i**2) for i in range(100))
+    assert myDB.close() == True
+
+    # Flags are not persisted, data is
+    myDB = ShareDB(path='./test_map_flags')
+    assert myDB.DB.flags()['writemap'] == True
+    assert list(myDB.multiget(range(100))) == [i**2 for i in range(100)]
+    assert myDB.drop() == True
+
+def test_readonly():
+    '''
+    Test readonly instances read and refuse writes.
+    '''
+    with pytest.raises(TypeError) as error:
+        myDB = ShareDB(path='./test_readonly', reset=True, readonly=True)
+    myDB = ShareDB(path='./test_readonly', reset=True)
+    myDB.multiset((i, i**2) for i in range(100))
+    assert myDB.close() == True
+
+    # Reads succeed, writes fail
+    myDB = ShareDB(path='./test_readonly', readonly=True)
+    assert len(myDB) == 100
+    assert list(myDB.multiget(range(100))) == [i**2 for i in range(100)]
+    for write in (lambda: myDB.set(0, 0),
+                  lambda: myDB.multiset([(0, 0)]),
+                  lambda: myDB.remove(0),
+                  lambda: myDB.multipop([0]),
+                  lambda: myDB.popitem(),
+                  lambda: myDB.clear(),
+                  lambda: myDB.drop()):
+        with pytest.raises(RuntimeError) as error:
+            write()
+    assert myDB.close() == True
+    assert ShareDB(path='./test_readonly').drop() == True
+
+def test_batch():
+    '''
+    Test batched writes commit or abort together.
+    '''
+    myDB = ShareDB(path='./test_batch', reset=True, cache_size=10)
+    myDB.multiset((i, i**2) for i in range(10))
+    assert myDB[5] == 25
+    with myDB.batch() as batchDB:
+        batchDB[5] = 'NEW'
+        batchDB.multiset((i, i**3) for i in range(10, 20))
+        assert list(batchDB.multipop([0, 1])) == [0, 1]
+        # Nested batches join the outer one
+        with batchDB.batch():
+            batchDB.remove(2)
+        # Uncommitted writes are not visible
+        assert batchDB[5] == 25
+        assert len(batchDB) == 10
+    assert myDB[5] == 'NEW'
+    assert len(myDB) == 17
+
+    # Failed batches leave no trace
+    with pytest.raises(KeyError) as error:
+        with myDB.batch():
+            myDB[100] = 100
+            myDB.pop(0)
+    assert 100 not in myDB
+    assert len(myDB) == 17
+
+    # Errors caught inside a batch keep the writes made before them
+    with myDB.batch():
+        with pytest.raises(ValueError) as error:
+            myDB.multiset([('a', 1), ('c', 3), ('b', 2)], append=True)
+    assert 'a' in myDB and 'b' not in myDB
+    assert myDB.drop() == True
+
+def test_cache_size():
+    '''
+    Test read cache coherence with writes.
+    '''
+    myDB = ShareDB(path='./test_cache_size', reset=True, cache_size=2)
+    myDB.multiset((i, i**2) for i in range(10))
+    assert [myDB.get(i) for i in range(10)] == [i**2 for i in range(10)]
+    assert len(myDB.RCACHE) == 2
+
+    # Writes invalidate cached values
+    myDB[9] = 'NEW'
+    assert myDB[9] == 'NEW'
+    myDB.remove(9)
+    assert myDB.get(9, default='SENTINEL') == 'SENTINEL'
+    myDB.multiset([(8, 'NEWER')])
+    assert myDB[8] == 'NEWER'
+    assert myDB.pop(8) == 'NEWER'
+    assert myDB.get(8) is None
+    myDB.clear()
+    assert myDB.get(8) is None
+
+    # Keys popped by committed chunks are evicted, even on failure
+    myDB.multiset((i, i) for i in range(3))
+    assert myDB.get(1) == 1
+    with pytest.raises(KeyError) as error:
+        list(myDB.multipop([1, 99], chunk_size=1))
+    assert 1 not in myDB
+    assert myDB.get(1) is None
+    pop_iter = myDB.multipop([2, 0], chunk_size=1)
+    assert myDB.get(2) == 2
+    assert next(pop_iter) == 2
+    assert next(pop_iter) == 0
+    pop_iter.close()
+    assert myDB.get(2) is None
+    myDB.clear()
+
+    # Cache hits return fresh objects
+    myDB[0] = [0]
+    myDB.get(0).append(1)
+    assert myDB.get(0) == [0]
+    myDB.get(0).append(1)
+    assert myDB.get(0) == [0]
+    assert myDB.drop() == True
+
+def test_cache_threads():
+    '''
+    Test read cache under concurrent reads and writes.
+    '''
+    myDB = ShareDB(path='./test_cache_threads', reset=True, cache_size=100)
+    myDB.multiset((i, i) for i in range(5))
+    errors = []
+    def write():
+        for i in range(20000):
+            myDB.remove(i % 5)
+            myDB[i % 5] = i % 5
+    def read():
+        try:
+            for i in range(50000):
+                myDB.get(i % 5)
+        except Exception as E:
+            errors.append(E)
+
+    # Switch threads often to interleave cache accesses
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=write)] + \
+                  [threading.Thread(target=read) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert errors == []
+    assert [myDB[i] for i in range(5)] == list(range(5))
+    assert myDB.drop() == True
+
+def test_autogrow():
+    '''
+    Test memory map growth on full instances.
+    '''
+    myDB = ShareDB(path='./test_autogrow', reset=True, map_size=2**16, autogrow=True)
+    for i in range(1000):
+        myDB[i] = 'ACGT'*100
+    myDB.multiset([(i, 'ACGT'*100) for i in range(1000, 2000)])
+    assert len(myDB) == 2000
+    assert myDB.MSLIMIT > 2**16
+    map_size = myDB.MSLIMIT
+    assert myDB.close() == True
+
+    # Grown size is persisted, and growth is off by default
+    myDB = ShareDB(path='./test_autogrow')
+    assert myDB.MSLIMIT == map_size
+    assert myDB[1999] == 'ACGT'*100
+    assert myDB.drop() == True
+
+    # Reader threads never see a map resized under them
+    myDB = ShareDB(path='./test_autogrow', reset=True, map_size=2**16, autogrow=True)
+    myDB[0] = 'ACGT'*100
+    done, errors = threading.Event(), []
+    def read():
+        try:
+            while not done.wait(timeout=0.0001):
+                assert myDB[0] == 'ACGT'*100
+        except Exception as E:
+            errors.append(E)
+    readers = [threading.Thread(target=read) for _ in range(3)]
+    for reader in readers:
+        reader.start()
+    try:
+        for i in range(1, 1000):
+            myDB[i] = 'ACGT'*100
+    finally:
+        done.set()
+        for reader in readers:
+            reader.join()
+    assert not errors
+    assert len(myDB) == 1000
+    assert myDB.drop() == True
+
+def read_grown_map(path, opened, grown, results):
+    '''
+    Read a ShareDB opened before another process grew its memory map.
+    '''
+    myDB = ShareDB(path=path, readonly=True)
+    opened.set()
+    grown.wait()
+    results.put((len(myDB), myDB.get(1999), sum(1 for _ in myDB.items())))
+    myDB.close()
+
+def test_autogrow_reader():
+    '''
+    Test reader processes adopt a memory map grown by the writer.
+    '''
+    myDB = ShareDB(path='./test_autogrow_reader', reset=True, map_size=2**16, autogrow=True)
+    myDB[0] = 0
+    context = multiprocessing.get_context('spawn')
+    opened, grown, results = context.Event(), context.Event(), context.Queue()
+    reader = context.Process(
+        target=read_grown_map, args=(myDB.PATH, opened, grown, results))
+    reader.start()
+    assert opened.wait(timeout=60)
+    myDB.multiset([(i, 'ACGT'*100) for i in range(1, 2000)])
+    assert myDB.MSLIMIT > 2**16
+    grown.set()
+    assert results.get(timeout=60) == (2000, 'ACGT'*100, 2000)
+    reader.join()
+    assert myDB.drop() == True
+
 @pytest.fixture
 def msgpack_myDB():
     '''